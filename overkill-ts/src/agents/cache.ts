@@ -0,0 +1,49 @@
+/**
+ * Agent Cache
+ * JSON-on-disk cache under ~/.cache/overkill, used to skip agent runs whose
+ * inputs have not changed since a previous session.
+ */
+
+import { createHash } from 'crypto'
+import { homedir } from 'os'
+import { join } from 'path'
+import { readFile, writeFile, mkdir } from 'fs/promises'
+
+const CACHE_ROOT = join(homedir(), '.cache', 'overkill')
+
+/**
+ * Build a cache key from the inputs an agent result depends on.
+ */
+export function cacheKey(...parts: string[]): string {
+  const hash = createHash('sha256')
+  for (const part of parts) {
+    hash.update(part)
+    hash.update('\0')
+  }
+  return hash.digest('hex')
+}
+
+/**
+ * Read a cached entry, or null on a miss.
+ */
+export async function readCache<T>(namespace: string, key: string): Promise<T | null> {
+  try {
+    const raw = await readFile(join(CACHE_ROOT, namespace, `${key}.json`), 'utf-8')
+    return JSON.parse(raw) as T
+  } catch {
+    return null
+  }
+}
+
+/**
+ * Store an entry. Failures are ignored: the cache is only an optimization.
+ */
+export async function writeCache<T>(namespace: string, key: string, value: T): Promise<void> {
+  try {
+    const dir = join(CACHE_ROOT, namespace)
+    await mkdir(dir, { recursive: true })
+    await writeFile(join(dir, `${key}.json`), JSON.stringify(value), 'utf-8')
+  } catch {
+    // Ignore - a missing cache entry only costs a fresh analysis
+  }
+}
@@ -4,13 +4,70 @@
  * Uses Claude Agent SDK for real AI-powered analysis.
  */
 
-import { query } from '@anthropic-ai/claude-agent-sdk'
+import { execFile } from 'child_process'
+import type { Dirent } from 'fs'
+import { readdir, stat } from 'fs/promises'
+import { basename, extname, join } from 'path'
+import { promisify } from 'util'
 import type { WorkerInfo } from './types'
+import { cacheKey, readCache, writeCache } from './cache'
+import { deferredPrompt, loadQuery, untilResult } from './sdk'
+
+const execFileAsync = promisify(execFile)
+
+const CACHE_NAMESPACE = 'explore'
+
+// Budget for the condensed analysis (~300 tokens)
+const DIGEST_MAX_CHARS = 1200
+const DIGEST_LINE_MAX_CHARS = 160
+const DIGEST_LINE_PATTERN = /^(#{1,6} |[-*+] |\d+\. )/
+
+// Most file listings should come from the index in the prompt
+const FILE_INDEX_LIMIT = 500
+
+// Files whose presence identifies the stack
+const STACK_MARKERS = new Set([
+  'package.json',
+  'tsconfig.json',
+  'pyproject.toml',
+  'setup.py',
+  'requirements.txt',
+  'go.mod',
+  'Cargo.toml',
+  'Gemfile',
+  'pom.xml',
+  'build.gradle',
+  'composer.json',
+  'Dockerfile',
+  'Makefile',
+])
+const MANIFEST_MARKER_LIMIT = 50
+const MANIFEST_EXTENSION_LIMIT = 15
+
+// Trees with more files than this are not fingerprinted, and so not cached
+const FINGERPRINT_FILE_LIMIT = 5000
+// Files stat'ed concurrently while fingerprinting
+const FINGERPRINT_BATCH_SIZE = 64
+
+// Directories skipped when walking a repository that is not under git
+const IGNORED_DIRS = new Set(['.git', 'node_modules', 'dist', 'build', 'out', '.venv', '__pycache__'])
 
 const EXPLORER_SYSTEM_PROMPT = `You are a senior software engineer analyzing a codebase. Focus on: stack, structure, patterns, conventions, and where features typically live.
 
+Read the stack manifest and file index from the request first, instead of listing directories or grepping for config files. Use Read, Grep and Glob to inspect files; Bash is limited to git ls-files, git log and wc.
+
 Be concise but thorough. Focus on actionable insights that will help with feature implementation.`
 
+// Bash is restricted to cheap read-only commands; the rest goes through native tools
+const EXPLORER_ALLOWED_TOOLS = [
+  'Read',
+  'Grep',
+  'Glob',
+  'Bash(git ls-files:*)',
+  'Bash(git log:*)',
+  'Bash(wc:*)',
+]
+
 const ANALYSIS_PROMPT = `Analyze this repository and provide:
 
 1. **Stack**: What technologies, frameworks, languages are used?
@@ -21,6 +78,30 @@ const ANALYSIS_PROMPT = `Analyze this repository and provide:
 
 Be concise but thorough. Focus on actionable insights.`
 
+type ToolInput = Record<string, unknown>
+
+const BASH_PREVIEW_LENGTH = 40
+
+/**
+ * Activity-log labels for the explorer's tools, resolved once per tool call
+ */
+const TOOL_FORMATTERS: Record<string, (input: ToolInput) => string> = {
+  Read: (input) => `Read(${String(input.file_path ?? 'unknown')})`,
+  Grep: (input) => `Grep(${String(input.pattern ?? '')})`,
+  Glob: (input) => `Glob(${String(input.pattern ?? '')})`,
+  Bash: (input) => {
+    const command = String(input.command ?? '')
+    return command.length > BASH_PREVIEW_LENGTH
+      ? `Bash(${command.slice(0, BASH_PREVIEW_LENGTH - 3)}...)`
+      : `Bash(${command})`
+  },
+}
+
+function formatToolUse(name: string, input: unknown): string {
+  const formatter = TOOL_FORMATTERS[name]
+  return formatter ? formatter((input ?? {}) as ToolInput) : `${name}(...)`
+}
+
 export interface ExplorerCallbacks {
   onWorkerStatus: (worker: WorkerInfo) => void
   onLog: (message: string, icon: string) => void
@@ -28,16 +109,254 @@ export interface ExplorerCallbacks {
 
 export interface ExplorerResult {
   summary: string
+  digest: string
   path: string
 }
 
+/**
+ * Condense an analysis into its headings and list items.
+ * Used by prompts that only need the gist of the repository, so the full
+ * analysis is not re-sent on every call.
+ */
+export function digestAnalysis(summary: string): string {
+  const lines: string[] = []
+  let length = 0
+
+  for (const rawLine of summary.split('\n')) {
+    if (!DIGEST_LINE_PATTERN.test(rawLine.trim())) continue
+
+    const line = rawLine.trimEnd()
+    const clipped =
+      line.length > DIGEST_LINE_MAX_CHARS ? `${line.slice(0, DIGEST_LINE_MAX_CHARS - 3)}...` : line
+    if (length + clipped.length > DIGEST_MAX_CHARS) break
+
+    lines.push(clipped)
+    length += clipped.length + 1
+  }
+
+  return lines.length > 0 ? lines.join('\n') : summary.slice(0, DIGEST_MAX_CHARS)
+}
+
+function toExplorerResult(summary: string, repoPath: string): ExplorerResult {
+  return {
+    summary,
+    digest: digestAnalysis(summary),
+    path: repoPath,
+  }
+}
+
+/**
+ * Resolve the current HEAD commit, or null if the path is not a git repository.
+ */
+export async function getGitHead(repoPath: string): Promise<string | null> {
+  try {
+    const { stdout } = await execFileAsync('git', ['rev-parse', 'HEAD'], { cwd: repoPath })
+    return stdout.trim() || null
+  } catch {
+    return null
+  }
+}
+
+interface StackManifest {
+  fileCount: number
+  // Set when the walk of a non-git tree stopped at its file limit
+  truncated?: boolean
+  markers: string[]
+  extensions: Record<string, number>
+}
+
+/**
+ * List tracked files in one git call, or an empty list outside git.
+ */
+async function listTrackedFiles(repoPath: string): Promise<string[]> {
+  try {
+    const { stdout } = await execFileAsync('git', ['ls-files', '-z'], {
+      cwd: repoPath,
+      maxBuffer: 64 * 1024 * 1024,
+    })
+    return stdout.split('\0').filter(Boolean)
+  } catch {
+    return []
+  }
+}
+
+/**
+ * List the files of a directory outside git. Each level of the tree is
+ * read concurrently, and ignored directories are pruned without being
+ * entered. The walk stops early once the signal is aborted, or one file
+ * past the fingerprint limit: no more than that is ever used.
+ */
+async function collectRepoFiles(repoPath: string, signal?: AbortSignal): Promise<string[]> {
+  const files: string[] = []
+  let dirs = ['']
+
+  while (dirs.length > 0 && !signal?.aborted) {
+    const listings = await Promise.all(
+      dirs.map((dir) =>
+        readdir(join(repoPath, dir), { withFileTypes: true }).catch((): Dirent[] => [])
+      )
+    )
+
+    const next: string[] = []
+    listings.forEach((entries, i) => {
+      for (const entry of entries) {
+        const path = join(dirs[i], entry.name)
+        if (entry.isDirectory()) {
+          if (!IGNORED_DIRS.has(entry.name)) next.push(path)
+        } else {
+          files.push(path)
+        }
+      }
+    })
+
+    if (files.length > FINGERPRINT_FILE_LIMIT) {
+      return files.slice(0, FINGERPRINT_FILE_LIMIT + 1)
+    }
+    dirs = next
+  }
+
+  return files
+}
+
+/**
+ * Fingerprint files from their path, modification time and size, so an
+ * analysis can be cached like a commit's. Returns null (no caching) for
+ * empty or oversized lists, or once the signal is aborted.
+ */
+async function fingerprintFiles(
+  repoPath: string,
+  files: string[],
+  signal?: AbortSignal
+): Promise<string | null> {
+  if (files.length === 0 || files.length > FINGERPRINT_FILE_LIMIT) return null
+
+  const sorted = [...files].sort()
+  const entries: string[] = []
+
+  for (let i = 0; i < sorted.length; i += FINGERPRINT_BATCH_SIZE) {
+    if (signal?.aborted) return null
+
+    const batch = await Promise.all(
+      sorted.slice(i, i + FINGERPRINT_BATCH_SIZE).map((file) =>
+        stat(join(repoPath, file)).then(
+          (info) => `${file}:${info.mtimeMs}:${info.size}`,
+          () => `${file}:missing`
+        )
+      )
+    )
+    entries.push(...batch)
+  }
+
+  return cacheKey(...entries)
+}
+
+/**
+ * Identify the state of a git working tree: HEAD, plus a fingerprint of
+ * the files with uncommitted changes, so edits made since the last commit
+ * invalidate the cached analysis. Null (no caching) when the status cannot
+ * be read or too many files are dirty.
+ */
+async function getWorktreeRevision(
+  repoPath: string,
+  head: string,
+  signal?: AbortSignal
+): Promise<string | null> {
+  // Status is limited to the chosen folder, which may be a subdirectory of
+  // the repository, but its paths are always relative to the repository root
+  let status: string
+  let root: string
+  try {
+    const [statusResult, rootResult] = await Promise.all([
+      execFileAsync('git', ['status', '--porcelain', '-z', '--untracked-files=all', '--', '.'], {
+        cwd: repoPath,
+        maxBuffer: 64 * 1024 * 1024,
+      }),
+      execFileAsync('git', ['rev-parse', '--show-toplevel'], { cwd: repoPath }),
+    ])
+    status = statusResult.stdout
+    root = rootResult.stdout.trim()
+  } catch {
+    return null
+  }
+
+  // Records are "XY path"; renames and copies are followed by the old path
+  const records = status.split('\0')
+  const dirty: string[] = []
+  for (let i = 0; i < records.length; i++) {
+    const record = records[i]
+    if (record.length < 4) continue
+    dirty.push(record.slice(3))
+    if (record[0] === 'R' || record[0] === 'C') i++
+  }
+
+  if (dirty.length === 0) return head
+
+  const fingerprint = await fingerprintFiles(root, dirty, signal)
+  return fingerprint ? `${head}:${fingerprint}` : null
+}
+
+/**
+ * Classify the file list in memory: stack marker files and an extension
+ * histogram, which is what most of Claude's early Grep/Glob calls look for.
+ */
+function buildStackManifest(files: string[], truncated: boolean): StackManifest {
+  const markers: string[] = []
+  const counts = new Map<string, number>()
+
+  for (const file of files) {
+    const name = basename(file)
+    if (STACK_MARKERS.has(name) && markers.length < MANIFEST_MARKER_LIMIT) {
+      markers.push(file)
+    }
+
+    const ext = extname(name)
+    if (ext) {
+      counts.set(ext, (counts.get(ext) ?? 0) + 1)
+    }
+  }
+
+  const extensions = Object.fromEntries(
+    [...counts].sort((a, b) => b[1] - a[1]).slice(0, MANIFEST_EXTENSION_LIMIT)
+  )
+
+  return { fileCount: files.length, ...(truncated ? { truncated } : {}), markers, extensions }
+}
+
+/**
+ * Append the stack manifest and a file index to the analysis prompt, so
+ * Claude does not have to shell out to discover the layout.
+ */
+function buildAnalysisPrompt(files: string[], truncated = false): string {
+  if (files.length === 0) return ANALYSIS_PROMPT
+
+  const manifest = JSON.stringify(buildStackManifest(files, truncated), null, 2)
+  const shown = files.slice(0, FILE_INDEX_LIMIT).join('\n')
+  const more =
+    files.length > FILE_INDEX_LIMIT ? `\n... and ${files.length - FILE_INDEX_LIMIT} more` : ''
+
+  return `${ANALYSIS_PROMPT}
+
+Stack manifest (precomputed):
+${manifest}
+
+File index (${files.length}${truncated ? '+' : ''} files):
+${shown}${more}`
+}
+
 /**
  * Run the CodeExplorer agent to analyze a repository.
- * Uses Claude Agent SDK with Read, Grep, Glob, and Bash tools.
+ * Uses Claude Agent SDK with Read, Grep, Glob, and a restricted Bash.
+ *
+ * Analyses are cached by HEAD commit and uncommitted changes (or, outside
+ * git, a fingerprint of the file tree) and prompts, so re-running on an
+ * unchanged repository skips the SDK session entirely.
+ * Callers that already resolved HEAD can pass it to skip the git call.
  */
 export async function runCodeExplorer(
   repoPath: string,
-  callbacks: ExplorerCallbacks
+  callbacks: ExplorerCallbacks,
+  gitHead?: string | null,
+  abortController?: AbortController
 ): Promise<ExplorerResult> {
   callbacks.onWorkerStatus({
     id: 'code-explorer',
@@ -48,7 +367,41 @@ export async function runCodeExplorer(
 
   callbacks.onLog('Starting repository analysis', '🔍')
 
+  const head = gitHead !== undefined ? gitHead : await getGitHead(repoPath)
+  const signal = abortController?.signal
+
+  // The file list feeds the prompt's index and, outside git, the cache key
+  const files = head ? listTrackedFiles(repoPath) : collectRepoFiles(repoPath, signal)
+  const revision = head
+    ? getWorktreeRevision(repoPath, head, signal)
+    : files.then((list) => fingerprintFiles(repoPath, list, signal))
+  const key = revision.then((rev) =>
+    rev ? cacheKey(repoPath, rev, EXPLORER_SYSTEM_PROMPT, ANALYSIS_PROMPT) : null
+  )
+
+  // The lookup is settled before any SDK process starts: a few git calls,
+  // or outside git the capped walk and fingerprint
+  const resolvedKey = await key
+  const cached = resolvedKey
+    ? await readCache<{ summary: string }>(CACHE_NAMESPACE, resolvedKey)
+    : null
+  if (cached) {
+    callbacks.onWorkerStatus({
+      id: 'code-explorer',
+      type: 'code-explorer',
+      status: 'completed',
+      output: cached.summary,
+    })
+
+    callbacks.onLog('Using cached repository analysis', '♻️')
+
+    return toExplorerResult(cached.summary, repoPath)
+  }
+
   let analysisText = ''
+  // Only a complete analysis is cached; partial text from an interrupted
+  // session (e.g. error_max_turns) is still used for this run
+  let succeeded = false
 
   try {
     callbacks.onWorkerStatus({
@@ -58,20 +411,27 @@ export async function runCodeExplorer(
       progress: 'Analyzing repository structure...',
     })
 
-    // Run the query with Claude Agent SDK
+    // Run the query with Claude Agent SDK; in a git repository the tracked
+    // file index is still being listed while the process starts
+    const query = await loadQuery()
     const result = query({
-      prompt: ANALYSIS_PROMPT,
+      prompt: deferredPrompt(
+        files.then((list) =>
+          buildAnalysisPrompt(list, !head && list.length > FINGERPRINT_FILE_LIMIT)
+        )
+      ),
       options: {
         cwd: repoPath,
         systemPrompt: EXPLORER_SYSTEM_PROMPT,
-        allowedTools: ['Read', 'Grep', 'Glob', 'Bash'],
+        allowedTools: EXPLORER_ALLOWED_TOOLS,
         permissionMode: 'acceptEdits',
         maxTurns: 10,
+        abortController,
       },
     })
 
     // Process the streaming response
-    for await (const message of result) {
+    for await (const message of untilResult(result)) {
       if (message.type === 'assistant') {
         // Extract text content from assistant message
         const content = message.message.content
@@ -81,7 +441,7 @@ export async function runCodeExplorer(
               analysisText += block.text
             } else if (block.type === 'tool_use') {
               // Log tool usage
-              callbacks.onLog(`Using ${block.name}...`, '🔧')
+              callbacks.onLog(formatToolUse(block.name, block.input), '🔧')
             }
           }
         } else if (typeof content === 'string') {
@@ -89,8 +449,11 @@ export async function runCodeExplorer(
         }
       } else if (message.type === 'result') {
         // Final result
-        if (message.subtype === 'success' && message.result) {
-          analysisText = message.result
+        if (message.subtype === 'success') {
+          succeeded = true
+          if (message.result) {
+            analysisText = message.result
+          }
         }
         callbacks.onLog(`Analysis complete (${message.num_turns} turns)`, '📊')
       }
@@ -105,11 +468,29 @@ export async function runCodeExplorer(
 
     callbacks.onLog('Repository analysis complete', '✅')
 
-    return {
-      summary: analysisText || generateFallbackSummary(repoPath),
-      path: repoPath,
+    if (!analysisText) {
+      return toExplorerResult(generateFallbackSummary(repoPath), repoPath)
+    }
+
+    if (resolvedKey && succeeded) {
+      await writeCache(CACHE_NAMESPACE, resolvedKey, { summary: analysisText })
     }
+
+    return toExplorerResult(analysisText, repoPath)
   } catch (error) {
+    if (abortController?.signal.aborted) {
+      callbacks.onLog('Analysis cancelled', '⚠️')
+
+      callbacks.onWorkerStatus({
+        id: 'code-explorer',
+        type: 'code-explorer',
+        status: 'idle',
+        progress: 'Cancelled',
+      })
+
+      return toExplorerResult(generateFallbackSummary(repoPath), repoPath)
+    }
+
     const errorMessage = error instanceof Error ? error.message : 'Unknown error'
     callbacks.onLog(`Analysis error: ${errorMessage}`, '❌')
 
@@ -121,10 +502,7 @@ export async function runCodeExplorer(
     })
 
     // Return a fallback summary on error
-    return {
-      summary: generateFallbackSummary(repoPath),
-      path: repoPath,
-    }
+    return toExplorerResult(generateFallbackSummary(repoPath), repoPath)
   }
 }
 
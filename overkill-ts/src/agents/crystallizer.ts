@@ -4,13 +4,16 @@
  * Uses Claude Agent SDK for real AI-powered specification generation.
  */
 
-import { query } from '@anthropic-ai/claude-agent-sdk'
 import type { AgentMessage } from './types'
-import type { EngineerSession } from './vibe-engineer'
+import type { Conversation, EngineerSession } from './vibe-engineer'
+import { loadQuery, untilResult } from './sdk'
+import { cacheKey, readCache, writeCache } from './cache'
 import { v4 as uuidv4 } from 'uuid'
-import { writeFile, mkdir } from 'fs/promises'
+import { readFile, writeFile, mkdir } from 'fs/promises'
 import { dirname } from 'path'
 
+const CACHE_NAMESPACE = 'spec'
+
 const CRYSTALLIZER_SYSTEM_PROMPT = `You are a technical writer creating executable specifications. Be precise, unambiguous, and actionable.
 
 When writing the SPEC.md file, ensure it is:
@@ -19,6 +22,19 @@ When writing the SPEC.md file, ensure it is:
 3. Explicit about what to do AND what NOT to do
 4. Contains all decisions made during the conversation`
 
+// Fixed head of every crystallize prompt
+const CRYSTALLIZE_INSTRUCTIONS = `Based on this vibe engineering session, generate a SPEC.md file that includes:
+
+1. **Feature Summary** - What we're building and why
+2. **Technical Decisions** - All decisions made during the conversation
+3. **Files to Create/Modify** - Exact file paths and what changes
+4. **Implementation Steps** - Clear, ordered steps
+5. **Constraints** - What NOT to do, patterns to follow
+6. **Acceptance Criteria** - How to verify it's done
+
+Make it so clear that ANY developer (or Claude Code) can execute it without asking questions.
+Use the exact file paths and patterns from the repo analysis.`
+
 export interface CrystallizerCallbacks {
   onMessage: (msg: AgentMessage) => void
   onLog: (message: string, icon: string) => void
@@ -29,36 +45,96 @@ export interface CrystallizerResult {
   success: boolean
 }
 
+/**
+ * Cache key for a generated spec: everything that shapes its content,
+ * but not the output path, so re-runs that only move the file still hit.
+ */
+function cacheKeyFor(session: EngineerSession): string {
+  return cacheKey(
+    CRYSTALLIZER_SYSTEM_PROMPT,
+    CRYSTALLIZE_INSTRUCTIONS,
+    session.repoAnalysis.summary,
+    session.featureRequest,
+    session.conversationFormatted
+  )
+}
+
+/**
+ * Tell the user where the spec was written.
+ */
+function notifySpecWritten(outputPath: string, callbacks: CrystallizerCallbacks): void {
+  callbacks.onMessage({
+    id: uuidv4(),
+    role: 'agent',
+    content: `Le SPEC.md a été généré avec succès!
+
+📄 **Fichier créé:** \`${outputPath}\`
+
+Le spec contient:
+- Résumé de la feature
+- Décisions techniques
+- Fichiers à créer/modifier
+- Étapes d'implémentation
+- Contraintes
+- Critères d'acceptation
+
+Tu peux maintenant utiliser ce spec pour implémenter la feature avec Claude Code.`,
+    timestamp: Date.now(),
+  })
+}
+
 /**
  * Run the Crystallizer agent to generate SPEC.md.
  * Uses Claude Agent SDK with Write tool to generate the spec.
+ *
+ * Specs are cached by session content and reused for identical sessions.
  */
 export async function runCrystallizer(
   session: EngineerSession,
   outputPath: string,
-  callbacks: CrystallizerCallbacks
+  callbacks: CrystallizerCallbacks,
+  abortController?: AbortController
 ): Promise<CrystallizerResult> {
   callbacks.onLog('Generating SPEC.md...', '📝')
 
-  const crystallizePrompt = buildCrystallizePrompt(session, outputPath)
+  const cached = await readCache<{ content: string }>(CACHE_NAMESPACE, cacheKeyFor(session))
+  if (cached) {
+    try {
+      await mkdir(dirname(outputPath), { recursive: true })
+      await writeFile(outputPath, cached.content, 'utf-8')
+
+      callbacks.onLog('Reusing SPEC from an identical session', '♻️')
+      notifySpecWritten(outputPath, callbacks)
+
+      return {
+        specPath: outputPath,
+        success: true,
+      }
+    } catch {
+      // Could not restore the cached spec, generate a fresh one
+    }
+  }
 
   try {
     // Run the query with Claude Agent SDK
+    const query = await loadQuery()
     const result = query({
-      prompt: crystallizePrompt,
+      prompt: buildCrystallizePrompt(session, outputPath),
       options: {
-        cwd: dirname(outputPath),
+        // Run from the repo: it always exists, unlike the output directory
+        cwd: session.repoAnalysis.path,
         systemPrompt: CRYSTALLIZER_SYSTEM_PROMPT,
         allowedTools: ['Write'],
         permissionMode: 'acceptEdits',
         maxTurns: 5,
+        abortController,
       },
     })
 
     let specGenerated = false
 
     // Process the streaming response
-    for await (const message of result) {
+    for await (const message of untilResult(result)) {
       if (message.type === 'assistant') {
         const content = message.message.content
         if (Array.isArray(content)) {
@@ -77,24 +153,13 @@ export async function runCrystallizer(
     }
 
     if (specGenerated) {
-      callbacks.onMessage({
-        id: uuidv4(),
-        role: 'agent',
-        content: `Le SPEC.md a été généré avec succès!
-
-📄 **Fichier créé:** \`${outputPath}\`
-
-Le spec contient:
-- Résumé de la feature
-- Décisions techniques
-- Fichiers à créer/modifier
-- Étapes d'implémentation
-- Contraintes
-- Critères d'acceptation
+      // Remember the spec so an identical session can reuse it
+      const specContent = await readFile(outputPath, 'utf-8').catch(() => null)
+      if (specContent) {
+        await writeCache(CACHE_NAMESPACE, cacheKeyFor(session), { content: specContent })
+      }
 
-Tu peux maintenant utiliser ce spec pour implémenter la feature avec Claude Code.`,
-        timestamp: Date.now(),
-      })
+      notifySpecWritten(outputPath, callbacks)
 
       return {
         specPath: outputPath,
@@ -106,6 +171,14 @@ Tu peux maintenant utiliser ce spec pour implémenter la feature avec Claude Cod
     callbacks.onLog('Using fallback spec generation', '⚠️')
     return generateSpecManually(session, outputPath, callbacks)
   } catch (error) {
+    if (abortController?.signal.aborted) {
+      callbacks.onLog('SPEC generation cancelled', '⚠️')
+      return {
+        specPath: outputPath,
+        success: false,
+      }
+    }
+
     const errorMessage = error instanceof Error ? error.message : 'Unknown error'
     callbacks.onLog(`Crystallizer error: ${errorMessage}`, '❌')
 
@@ -114,29 +187,24 @@ Tu peux maintenant utiliser ce spec pour implémenter la feature avec Claude Cod
   }
 }
 
+/**
+ * Build the crystallize prompt.
+ * The instructions come first and never change, so the prompt prefix stays
+ * cacheable; all per-session content is appended at the end.
+ */
 function buildCrystallizePrompt(session: EngineerSession, outputPath: string): string {
-  return `Based on this vibe engineering session, generate a SPEC.md file.
+  return `${CRYSTALLIZE_INSTRUCTIONS}
 
-Repository Analysis:
-${session.repoAnalysis.summary}
+Repository Analysis (condensed):
+${session.repoAnalysis.digest}
 
 Original Feature Request:
 ${session.featureRequest}
 
 Conversation and Decisions:
-${formatConversation(session.conversation)}
-
-Create a SPEC.md file at ${outputPath} that includes:
-
-1. **Feature Summary** - What we're building and why
-2. **Technical Decisions** - All decisions made during the conversation
-3. **Files to Create/Modify** - Exact file paths and what changes
-4. **Implementation Steps** - Clear, ordered steps
-5. **Constraints** - What NOT to do, patterns to follow
-6. **Acceptance Criteria** - How to verify it's done
+${session.conversationFormatted}
 
-Make it so clear that ANY developer (or Claude Code) can execute it without asking questions.
-Use the exact file paths and patterns from the repo analysis.`
+Create the SPEC.md file at ${outputPath}.`
 }
 
 /**
@@ -159,24 +227,7 @@ async function generateSpecManually(
 
     callbacks.onLog(`SPEC.md written to ${outputPath}`, '✅')
 
-    callbacks.onMessage({
-      id: uuidv4(),
-      role: 'agent',
-      content: `Le SPEC.md a été généré avec succès!
-
-📄 **Fichier créé:** \`${outputPath}\`
-
-Le spec contient:
-- Résumé de la feature
-- Décisions techniques
-- Fichiers à créer/modifier
-- Étapes d'implémentation
-- Contraintes
-- Critères d'acceptation
-
-Tu peux maintenant utiliser ce spec pour implémenter la feature avec Claude Code.`,
-      timestamp: Date.now(),
-    })
+    notifySpecWritten(outputPath, callbacks)
 
     return {
       specPath: outputPath,
@@ -193,17 +244,6 @@ Tu peux maintenant utiliser ce spec pour implémenter la feature avec Claude Cod
   }
 }
 
-function formatConversation(
-  conversation: Array<{ role: 'user' | 'assistant'; content: string }>
-): string {
-  return conversation
-    .map((turn) => {
-      const role = turn.role === 'user' ? 'USER' : 'ASSISTANT'
-      return `${role}: ${turn.content}`
-    })
-    .join('\n\n')
-}
-
 /**
  * Generate the SPEC.md content from the session.
  */
@@ -323,21 +363,18 @@ ${conversationSummary}
 `
 }
 
-function formatConversationForSpec(
-  conversation: Array<{ role: 'user' | 'assistant'; content: string }>
-): string {
-  return conversation
-    .map((turn) => {
-      const role = turn.role === 'user' ? '**USER**' : '**ASSISTANT**'
-      return `${role}:\n${turn.content}`
+function formatConversationForSpec(conversation: Conversation): string {
+  const { roles, contents } = conversation
+  return contents
+    .map((content, i) => {
+      const role = roles[i] === 'user' ? '**USER**' : '**ASSISTANT**'
+      return `${role}:\n${content}`
     })
     .join('\n\n---\n\n')
 }
 
-function extractDecisions(
-  conversation: Array<{ role: 'user' | 'assistant'; content: string }>
-): string {
-  const userResponses = conversation.filter((t) => t.role === 'user')
+function extractDecisions(conversation: Conversation): string {
+  const userResponses = conversation.contents.filter((_, i) => conversation.roles[i] === 'user')
 
   if (userResponses.length === 0) {
     return '*No explicit decisions recorded in conversation.*'
@@ -346,9 +383,9 @@ function extractDecisions(
   return userResponses
     .map((response, index) => {
       return `### Decision ${index + 1}
-> "${response.content.slice(0, 200)}${response.content.length > 200 ? '...' : ''}"`
+> "${response.slice(0, 200)}${response.length > 200 ? '...' : ''}"`
     })
     .join('\n\n')
 }
 
-export { CRYSTALLIZER_SYSTEM_PROMPT }
+export { CRYSTALLIZER_SYSTEM_PROMPT, CRYSTALLIZE_INSTRUCTIONS }
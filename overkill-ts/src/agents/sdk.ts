@@ -0,0 +1,77 @@
+/**
+ * SDK helpers
+ * Small utilities shared by the agents around the Claude Agent SDK.
+ */
+
+import type { SDKUserMessage, query as sdkQuery } from '@anthropic-ai/claude-agent-sdk'
+
+/**
+ * Load the SDK's query() on first use.
+ * Keeps the SDK and its dependencies off the app startup path; later calls
+ * hit the module cache.
+ */
+export async function loadQuery(): Promise<typeof sdkQuery> {
+  const { query } = await import('@anthropic-ai/claude-agent-sdk')
+  return query
+}
+
+/**
+ * Wrap a prompt that is still being computed as a streaming input.
+ * Passing this to query() lets the SDK spawn and initialize the Claude Code
+ * process right away; the user message is only sent once the prompt resolves.
+ */
+export async function* deferredPrompt(prompt: Promise<string>): AsyncGenerator<SDKUserMessage> {
+  const content = await prompt
+  yield {
+    type: 'user',
+    message: { role: 'user', content },
+    parent_tool_use_id: null,
+    session_id: '',
+  }
+}
+
+/**
+ * Iterate SDK messages up to and including the result message.
+ * Whatever the process emits after its result (shutdown, stream close) is
+ * drained in the background so the caller can move on immediately. If the
+ * caller stops before the result (break, throw), the stream is closed so
+ * the SDK tears down its process instead of leaving it running.
+ */
+export async function* untilResult<T extends { type: string }>(
+  messages: AsyncIterable<T>
+): AsyncGenerator<T> {
+  const iterator = messages[Symbol.asyncIterator]()
+  let done = false
+  let reachedResult = false
+
+  try {
+    while (!reachedResult) {
+      const next = await iterator.next()
+      if (next.done) {
+        done = true
+        return
+      }
+
+      reachedResult = next.value.type === 'result'
+      yield next.value
+    }
+  } finally {
+    if (reachedResult) {
+      drainInBackground(iterator)
+    } else if (!done) {
+      await iterator.return?.()?.catch(() => undefined)
+    }
+  }
+}
+
+function drainInBackground(iterator: AsyncIterator<unknown>): void {
+  void (async () => {
+    try {
+      while (!(await iterator.next()).done) {
+        // Discard trailing messages
+      }
+    } catch {
+      // The turn already produced its result; late stream errors don't matter
+    }
+  })()
+}
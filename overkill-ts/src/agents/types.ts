@@ -1,6 +1,7 @@
 // Re-export shared types for agents
 export type {
   AgentMessage,
+  AgentMessageDelta,
   WorkerType,
   WorkerStatus,
   WorkerInfo,
@@ -22,11 +23,13 @@ export interface AgentOptions {
 
 export interface ExplorerResult {
   summary: string
+  digest: string
   path: string
 }
 
 export interface EngineerSession {
-  conversation: Array<{ role: 'user' | 'assistant'; content: string }>
+  conversation: { roles: Array<'user' | 'assistant'>; contents: string[] }
+  conversationFormatted: string
   repoAnalysis: string
   featureRequest: string
   decisions: Array<{ topic: string; choice: string; rationale: string }>
@@ -7,8 +7,9 @@
  * It must be preserved exactly as-is from the Python version.
  */
 
-import { query } from '@anthropic-ai/claude-agent-sdk'
-import type { AgentMessage, Decision } from './types'
+import type { AgentMessage, AgentMessageDelta, Decision } from './types'
+import type { ExplorerResult } from './code-explorer'
+import { deferredPrompt, loadQuery, untilResult } from './sdk'
 import { v4 as uuidv4 } from 'uuid'
 
 /**
@@ -55,18 +56,73 @@ Remember: You're forcing decisions out of the black box, not making them yoursel
 
 The user will tell you when they're ready to finish by saying "done" or similar.`
 
+// Fixed head of the first engineer prompt
+const INITIAL_INSTRUCTIONS =
+  'Start the vibe engineering conversation. Ask your first question to understand what the user really wants.'
+
+// Marker the engineer emits once it has enough decisions for a spec
+const SPEC_READY_MARKER = 'SPEC_READY'
+
+// Inputs that end the conversation
+const FINISH_COMMANDS = new Set(['done', 'exit', 'quit', 'finish'])
+
 export interface EngineerCallbacks {
   onMessage: (msg: AgentMessage) => void
+  onMessageDelta: (delta: AgentMessageDelta) => void
   onLog: (message: string, icon: string) => void
 }
 
+type Role = 'user' | 'assistant'
+
+/**
+ * Conversation turns as parallel arrays: roles[i] goes with contents[i]
+ */
+export interface Conversation {
+  roles: Role[]
+  contents: string[]
+}
+
 export interface EngineerSession {
-  conversation: Array<{ role: 'user' | 'assistant'; content: string }>
-  repoAnalysis: { summary: string; path: string }
+  conversation: Conversation
+  /** Conversation formatted as USER/ASSISTANT turns, ready for prompts */
+  conversationFormatted: string
+  repoAnalysis: ExplorerResult
   featureRequest: string
   decisions: Decision[]
 }
 
+/**
+ * Conversation history, formatted for prompts once the session is handed off.
+ */
+class Transcript implements Conversation {
+  readonly roles: Role[] = []
+  readonly contents: string[] = []
+
+  add(role: Role, content: string): void {
+    this.roles.push(role)
+    this.contents.push(content)
+  }
+
+  get formatted(): string {
+    return this.contents
+      .map((content, i) => `${this.roles[i] === 'user' ? 'USER' : 'ASSISTANT'}: ${content}`)
+      .join('\n\n')
+  }
+}
+
+/**
+ * Check a reply for the SPEC_READY marker.
+ * The whole reply is scanned: the prompt asks Claude to say SPEC_READY and
+ * then summarize, so the marker is not necessarily near the end.
+ */
+function isSpecReady(text: string): boolean {
+  return text.includes(SPEC_READY_MARKER)
+}
+
+function isFinishCommand(input: string): boolean {
+  return FINISH_COMMANDS.has(input.trim().toLowerCase())
+}
+
 /**
  * Extract session_id from SDK messages
  */
@@ -111,21 +167,46 @@ function extractTextContent(message: unknown): string {
 }
 
 /**
- * Run a single query turn and collect results
+ * Extract streamed text from an SDK partial message
+ */
+function extractTextDelta(message: unknown): string {
+  if (!message || typeof message !== 'object') return ''
+
+  const msg = message as {
+    type?: string
+    event?: { type?: string; delta?: { type?: string; text?: string } }
+  }
+  if (msg.type !== 'stream_event') return ''
+
+  const event = msg.event
+  if (event?.type !== 'content_block_delta' || event.delta?.type !== 'text_delta') return ''
+
+  return event.delta.text ?? ''
+}
+
+/**
+ * Run a single query turn and collect results.
+ * Text is forwarded to onDelta as it streams in.
+ * A pending prompt is sent as streaming input so the SDK can start up early.
  */
 async function runSingleTurn(
-  prompt: string,
+  prompt: string | Promise<string>,
   cwd: string,
-  sessionId?: string
+  sessionId?: string,
+  onDelta?: (text: string) => void,
+  abortController?: AbortController
 ): Promise<{ text: string; sessionId: string | null; numTurns: number }> {
+  const query = await loadQuery()
   const result = query({
-    prompt,
+    prompt: typeof prompt === 'string' ? prompt : deferredPrompt(prompt),
     options: {
       cwd,
       systemPrompt: VIBE_ENGINEER_SYSTEM_PROMPT,
       tools: [], // No tools for engineer - pure conversation
       permissionMode: 'default',
       maxTurns: 1,
+      includePartialMessages: Boolean(onDelta),
+      abortController,
       ...(sessionId ? { resume: sessionId } : {}),
     },
   })
@@ -134,12 +215,20 @@ async function runSingleTurn(
   let extractedSessionId: string | null = null
   let numTurns = 0
 
-  for await (const message of result) {
+  for await (const message of untilResult(result)) {
     // Extract session_id from any message
     if (!extractedSessionId && message && 'session_id' in message) {
       extractedSessionId = (message as { session_id: string }).session_id
     }
 
+    // Forward streamed text as it arrives
+    if (onDelta) {
+      const delta = extractTextDelta(message)
+      if (delta) {
+        onDelta(delta)
+      }
+    }
+
     // Extract text from assistant messages
     const msgText = extractTextContent(message)
     if (msgText) {
@@ -158,56 +247,102 @@ async function runSingleTurn(
   return { text, sessionId: extractedSessionId, numTurns }
 }
 
+/**
+ * Assemble the session handed to the Crystallizer.
+ */
+function buildSession(
+  transcript: Transcript,
+  repoAnalysis: ExplorerResult,
+  featureRequest: string,
+  decisions: Decision[]
+): EngineerSession {
+  return {
+    conversation: transcript,
+    conversationFormatted: transcript.formatted,
+    repoAnalysis,
+    featureRequest,
+    decisions,
+  }
+}
+
 /**
  * Run the VibeEngineer agent for interactive conversation.
  * Uses multiple single-turn queries with session resume for multi-turn.
+ *
+ * The repository analysis may still be in flight: the first query is issued
+ * immediately and only sends its prompt once the analysis resolves.
+ * Aborting the controller stops the turn in flight and ends the session.
  */
 export async function runVibeEngineer(
-  repoAnalysis: { summary: string; path: string },
+  repoPath: string,
+  repoAnalysis: Promise<ExplorerResult>,
   featureRequest: string,
   callbacks: EngineerCallbacks,
-  getUserInput: () => Promise<string>
+  getUserInput: () => Promise<string>,
+  abortController?: AbortController
 ): Promise<EngineerSession> {
-  const conversationHistory: Array<{ role: 'user' | 'assistant'; content: string }> = []
+  const transcript = new Transcript()
   const decisions: Decision[] = []
 
-  callbacks.onLog('Vibe engineering session started', '🎯')
-  callbacks.onLog(`Feature: ${featureRequest.slice(0, 50)}...`, '📋')
-
   // Build initial prompt
-  const initialPrompt = `Repository Analysis:
-${repoAnalysis.summary}
+  const initialPrompt = repoAnalysis.then((analysis) => {
+    callbacks.onLog('Vibe engineering session started', '🎯')
+    callbacks.onLog(`Feature: ${featureRequest.slice(0, 50)}...`, '📋')
+    callbacks.onLog('Generating initial question...', '💭')
+
+    // Stable instructions first, per-session content last (cache-friendly prefix)
+    return `${INITIAL_INSTRUCTIONS}
 
-Feature Request: ${featureRequest}
+Repository Analysis:
+${analysis.summary}
 
-Start the vibe engineering conversation. Ask your first question to understand what the user really wants.`
+Feature Request: ${featureRequest}`
+  })
 
   let currentSessionId: string | null = null
 
+  // Input is captured while each reply is still streaming, so a message the
+  // user sends before the turn finishes is picked up instead of dropped.
+  let nextInput = getUserInput()
+
+  // Reply currently streaming to the UI, so a turn that fails midway can
+  // still finalize what was shown instead of leaving it marked as streaming
+  const inFlight = { id: '', text: '' }
+  const streamReply = (id: string) => {
+    inFlight.id = id
+    inFlight.text = ''
+    return (delta: string) => {
+      inFlight.text += delta
+      callbacks.onMessageDelta({ id, delta })
+    }
+  }
+
   try {
     // First turn - initial question
-    callbacks.onLog('Generating initial question...', '💭')
-    const firstTurn = await runSingleTurn(initialPrompt, repoAnalysis.path)
+    const firstMessageId = uuidv4()
+    const firstTurn = await runSingleTurn(
+      initialPrompt,
+      repoPath,
+      undefined,
+      streamReply(firstMessageId),
+      abortController
+    )
+    inFlight.id = ''
 
     currentSessionId = firstTurn.sessionId
 
     if (firstTurn.text) {
-      conversationHistory.push({ role: 'assistant', content: firstTurn.text })
+      transcript.add('assistant', firstTurn.text)
       callbacks.onMessage({
-        id: uuidv4(),
+        id: firstMessageId,
         role: 'agent',
         content: firstTurn.text,
         timestamp: Date.now(),
       })
 
-      if (firstTurn.text.includes('SPEC_READY')) {
+      if (isSpecReady(firstTurn.text)) {
         callbacks.onLog('Ready to generate SPEC', '✅')
-        return {
-          conversation: conversationHistory,
-          repoAnalysis,
-          featureRequest,
-          decisions,
-        }
+        return buildSession(transcript, await repoAnalysis, featureRequest, decisions)
       }
     }
 
@@ -217,18 +352,17 @@ Start the vibe engineering conversation. Ask your first question to understand w
 
     while (turnCount < maxTurns) {
       // Get user input
-      const userInput = await getUserInput()
+      const userInput = await nextInput
 
       if (!userInput || userInput === '__CANCELLED__') {
         callbacks.onLog('Session cancelled', '⚠️')
         break
       }
 
-      conversationHistory.push({ role: 'user', content: userInput })
+      transcript.add('user', userInput)
 
       // Check for termination signals
-      const lowerInput = userInput.toLowerCase().trim()
-      if (['done', 'exit', 'quit', 'finish'].includes(lowerInput)) {
+      if (isFinishCommand(userInput)) {
         callbacks.onLog('User requested finish', '✅')
         break
       }
@@ -236,27 +370,32 @@ Start the vibe engineering conversation. Ask your first question to understand w
       turnCount++
       callbacks.onLog(`Processing turn ${turnCount}...`, '💭')
 
-      // Run next turn with user's input
+      // Run next turn with user's input, listening for the next reply meanwhile
+      nextInput = getUserInput()
+      const messageId = uuidv4()
       const turn = await runSingleTurn(
         userInput,
-        repoAnalysis.path,
-        currentSessionId || undefined
+        repoPath,
+        currentSessionId || undefined,
+        streamReply(messageId),
+        abortController
       )
+      inFlight.id = ''
 
       if (turn.sessionId) {
         currentSessionId = turn.sessionId
       }
 
       if (turn.text) {
-        conversationHistory.push({ role: 'assistant', content: turn.text })
+        transcript.add('assistant', turn.text)
         callbacks.onMessage({
-          id: uuidv4(),
+          id: messageId,
           role: 'agent',
           content: turn.text,
           timestamp: Date.now(),
         })
 
-        if (turn.text.includes('SPEC_READY')) {
+        if (isSpecReady(turn.text)) {
           callbacks.onLog('Ready to generate SPEC', '✅')
           break
         }
@@ -265,23 +404,33 @@ Start the vibe engineering conversation. Ask your first question to understand w
 
     callbacks.onLog('Engineering session complete', '✅')
 
-    return {
-      conversation: conversationHistory,
-      repoAnalysis,
-      featureRequest,
-      decisions,
-    }
+    return buildSession(transcript, await repoAnalysis, featureRequest, decisions)
   } catch (error) {
+    if (inFlight.id && inFlight.text) {
+      callbacks.onMessage({
+        id: inFlight.id,
+        role: 'agent',
+        content: inFlight.text,
+        timestamp: Date.now(),
+      })
+    }
+
+    if (abortController?.signal.aborted) {
+      callbacks.onLog('Session cancelled', '⚠️')
+      return buildSession(transcript, await repoAnalysis, featureRequest, decisions)
+    }
+
     const errorMessage = error instanceof Error ? error.message : 'Unknown error'
     callbacks.onLog(`SDK error: ${errorMessage}, using fallback`, '⚠️')
 
     // Fall back to simulated conversation if SDK fails
     return runSimulatedConversation(
-      repoAnalysis,
+      await repoAnalysis,
       featureRequest,
       callbacks,
       getUserInput,
-      conversationHistory
+      transcript,
+      nextInput
     )
   }
 }
@@ -290,23 +439,23 @@ Start the vibe engineering conversation. Ask your first question to understand w
  * Fallback simulated conversation when SDK is unavailable
  */
 async function runSimulatedConversation(
-  repoAnalysis: { summary: string; path: string },
+  repoAnalysis: ExplorerResult,
   featureRequest: string,
   callbacks: EngineerCallbacks,
   getUserInput: () => Promise<string>,
-  existingHistory: Array<{ role: 'user' | 'assistant'; content: string }>
+  transcript: Transcript,
+  pendingInput: Promise<string>
 ): Promise<EngineerSession> {
-  const conversationHistory = existingHistory
   const decisions: Decision[] = []
 
   callbacks.onLog('Using fallback conversation mode', '⚠️')
 
   // Only send first response if we don't have any assistant messages yet
-  const hasAssistantMessage = conversationHistory.some((h) => h.role === 'assistant')
+  const hasAssistantMessage = transcript.roles.includes('assistant')
 
   if (!hasAssistantMessage) {
     const firstResponse = generateFirstQuestion(repoAnalysis, featureRequest)
-    conversationHistory.push({ role: 'assistant', content: firstResponse })
+    transcript.add('assistant', firstResponse)
 
     callbacks.onMessage({
       id: uuidv4(),
@@ -318,37 +467,40 @@ async function runSimulatedConversation(
 
   // Conversation loop
   let turnCount = 0
+  // The first reply may already be on its way from the interrupted SDK session
+  let nextInput = pendingInput
+
   while (turnCount < 5) {
-    const userInput = await getUserInput()
+    const userInput = await nextInput
 
     if (!userInput || userInput === '__CANCELLED__') {
       break
     }
 
-    conversationHistory.push({ role: 'user', content: userInput })
+    transcript.add('user', userInput)
 
-    const lowerInput = userInput.toLowerCase().trim()
-    if (['done', 'exit', 'quit', 'finish'].includes(lowerInput)) {
+    if (isFinishCommand(userInput)) {
       break
     }
 
     turnCount++
+    nextInput = getUserInput()
 
     // Generate next response based on turn count
     let response: string
     switch (turnCount) {
       case 1:
-        response = generateArchitectureQuestion()
+        response = ARCHITECTURE_QUESTION
         break
       case 2:
-        response = generateUIQuestion()
+        response = UI_QUESTION
         break
       default:
-        response = generateSpecReadyMessage(featureRequest, conversationHistory)
+        response = generateSpecReadyMessage(featureRequest, transcript)
         break
     }
 
-    conversationHistory.push({ role: 'assistant', content: response })
+    transcript.add('assistant', response)
 
     callbacks.onMessage({
       id: uuidv4(),
@@ -357,43 +509,15 @@ async function runSimulatedConversation(
       timestamp: Date.now(),
     })
 
-    if (response.includes('SPEC_READY')) {
+    if (isSpecReady(response)) {
       break
     }
   }
 
-  return {
-    conversation: conversationHistory,
-    repoAnalysis,
-    featureRequest,
-    decisions,
-  }
+  return buildSession(transcript, repoAnalysis, featureRequest, decisions)
 }
 
-function generateFirstQuestion(
-  repoAnalysis: { summary: string; path: string },
-  featureRequest: string
-): string {
-  const repoName = repoAnalysis.path.split('/').pop() || 'the repository'
-
-  return `Salut! J'ai analysé **${repoName}** et je vois que tu veux:
-
-> "${featureRequest}"
-
-Avant de plonger dans les détails, laisse-moi comprendre ta vision.
-
-**Quel est l'objectif principal de cette feature?**
-
-Quick win ◆━━━━━━━━━━━━━━━◆ Foundation
-→ Résoudre un problème immédiat    → Poser les bases pour le futur
-→ Livraison rapide                 → Plus de flexibilité
-→ Scope limité                     → Investissement initial
-
-Où te situes-tu sur ce spectrum? Dis-moi aussi le contexte: c'est pour toi, un client, un projet open source?`
-}
-
-function generateArchitectureQuestion(): string {
-  return `Je vois mieux maintenant. Parlons architecture.
+const ARCHITECTURE_QUESTION = `Je vois mieux maintenant. Parlons architecture.
 
 **Comment vois-tu l'organisation du code?**
 
@@ -409,10 +533,8 @@ Minimal ◆━━━━━━━━━━━━━━━◆ Libraries
 → Code maison                      → Battle-tested
 
 Partage-moi tes préférences. Je note tout pour le SPEC.`
-}
 
-function generateUIQuestion(): string {
-  return `Excellent! On avance bien.
+const UI_QUESTION = `Excellent! On avance bien.
 
 **Pour l'interface (si applicable):**
 
@@ -428,13 +550,34 @@ Basique ◆━━━━━━━━━━━━━━━◆ Élaboré
 
 Si t'as assez discuté et que tu veux que je génère le SPEC, tape **done**.
 Sinon, dis-moi tes préférences et on continue.`
+
+function generateFirstQuestion(
+  repoAnalysis: { summary: string; path: string },
+  featureRequest: string
+): string {
+  const repoName = repoAnalysis.path.split('/').pop() || 'the repository'
+
+  return `Salut! J'ai analysé **${repoName}** et je vois que tu veux:
+
+> "${featureRequest}"
+
+Avant de plonger dans les détails, laisse-moi comprendre ta vision.
+
+**Quel est l'objectif principal de cette feature?**
+
+Quick win ◆━━━━━━━━━━━━━━━◆ Foundation
+→ Résoudre un problème immédiat    → Poser les bases pour le futur
+→ Livraison rapide                 → Plus de flexibilité
+→ Scope limité                     → Investissement initial
+
+Où te situes-tu sur ce spectrum? Dis-moi aussi le contexte: c'est pour toi, un client, un projet open source?`
 }
 
 function generateSpecReadyMessage(
   featureRequest: string,
-  history: Array<{ role: 'user' | 'assistant'; content: string }>
+  history: Conversation
 ): string {
-  const userMessages = history.filter((h) => h.role === 'user').map((h) => h.content)
+  const userMessages = history.contents.filter((_, i) => history.roles[i] === 'user')
 
   return `SPEC_READY!
 
@@ -3,23 +3,103 @@
  * Orchestrates the 3-phase pipeline: Explorer → Engineer → Crystallizer
  */
 
-import { BrowserWindow } from 'electron'
-import { join } from 'path'
+import type { BrowserWindow, WebContents } from 'electron'
+import { stat } from 'fs/promises'
+import { join, resolve } from 'path'
 import { v4 as uuidv4 } from 'uuid'
 import { IPC_CHANNELS } from '../shared/ipc-channels'
-import type { AgentMessage, WorkerInfo, Phase, PipelineResult, LogEntry } from '../shared/types'
-import { runCodeExplorer } from '../agents/code-explorer'
+import type { AgentMessage, AgentMessageDelta, WorkerInfo, Phase, PipelineResult, LogEntry } from '../shared/types'
+import { getGitHead, runCodeExplorer } from '../agents/code-explorer'
+import type { ExplorerCallbacks } from '../agents/code-explorer'
 import { runVibeEngineer } from '../agents/vibe-engineer'
 import { runCrystallizer } from '../agents/crystallizer'
+import type { ExplorerResult } from '../agents/types'
+
+// Log entries are sent to the renderer in batches at most this often
+const LOG_FLUSH_MS = 50
+
+/**
+ * Explorer callbacks that queue events until a pipeline attaches to them,
+ * so a speculative analysis can later replay its progress in the UI.
+ */
+class ExplorerRelay implements ExplorerCallbacks {
+  private queued: Array<(target: ExplorerCallbacks) => void> = []
+  private target: ExplorerCallbacks | null = null
+
+  onWorkerStatus = (worker: WorkerInfo): void => this.emit((t) => t.onWorkerStatus(worker))
+
+  onLog = (message: string, icon: string): void => this.emit((t) => t.onLog(message, icon))
+
+  attach(target: ExplorerCallbacks): void {
+    this.target = target
+    for (const event of this.queued) {
+      event(target)
+    }
+    this.queued = []
+  }
+
+  private emit(event: (target: ExplorerCallbacks) => void): void {
+    if (this.target) {
+      event(this.target)
+    } else {
+      this.queued.push(event)
+    }
+  }
+}
+
+interface PrefetchedAnalysis {
+  repoPath: string
+  relay: ExplorerRelay
+  abortController: AbortController
+  // Null when the path turned out not to be a directory
+  result: Promise<ExplorerResult | null>
+}
+
+function isDirectory(path: string): Promise<boolean> {
+  return stat(path).then((stats) => stats.isDirectory(), () => false)
+}
 
 export class AgentController {
-  private mainWindow: BrowserWindow
+  // Resolved once; every update to the renderer goes through it
+  private webContents: WebContents
   private userInputResolve: ((value: string) => void) | null = null
-  private conversationHistory: AgentMessage[] = []
+  // Messages sent while the engineer was not waiting, oldest first
+  private queuedInputs: string[] = []
   private isRunning = false
+  private prefetched: PrefetchedAnalysis | null = null
+  // Cancels the SDK queries of the running pipeline
+  private abortController: AbortController | null = null
+  private pendingLogs: LogEntry[] = []
+  private logFlushTimer: ReturnType<typeof setTimeout> | null = null
 
   constructor(mainWindow: BrowserWindow) {
-    this.mainWindow = mainWindow
+    this.webContents = mainWindow.webContents
+  }
+
+  /**
+   * Start analyzing a repository as soon as it is picked in the directory
+   * dialog, before the pipeline is started. Its progress is buffered and replayed when a
+   * pipeline for the same path adopts it.
+   */
+  prefetchAnalysis(repoPath: string): void {
+    if (this.isRunning || !repoPath) return
+
+    // Normalized so the same directory always matches its prefetch and cache key
+    repoPath = resolve(repoPath)
+    if (this.prefetched?.repoPath === repoPath) return
+    this.prefetched?.abortController.abort()
+
+    const relay = new ExplorerRelay()
+    const abortController = new AbortController()
+    const result = Promise.all([isDirectory(repoPath), getGitHead(repoPath)]).then(
+      // A prefetch superseded during these checks never starts its session
+      ([exists, gitHead]) =>
+        exists && !abortController.signal.aborted
+          ? runCodeExplorer(repoPath, relay, gitHead, abortController)
+          : null
+    )
+
+    this.prefetched = { repoPath, relay, abortController, result }
   }
 
   /**
@@ -31,28 +111,79 @@ export class AgentController {
     }
 
     this.isRunning = true
-    this.conversationHistory = []
+    this.queuedInputs = []
+
+    // Typed paths may be relative or contain trailing slashes and '..'
+    repoPath = resolve(repoPath)
+
+    // A speculative analysis of another path is no longer useful
+    const prefetched = this.prefetched?.repoPath === repoPath ? this.prefetched : null
+    if (!prefetched) {
+      this.prefetched?.abortController.abort()
+    }
+    this.prefetched = null
+
+    // An adopted analysis is cancelled along with the rest of the pipeline
+    const abortController = prefetched?.abortController ?? new AbortController()
+    this.abortController = abortController
 
     try {
+      // Sanity checks run concurrently: the path must be a directory, and
+      // its HEAD (if any) is handed to the explorer for the cache lookup
+      const [exists, gitHead] = await Promise.all([
+        isDirectory(repoPath),
+        getGitHead(repoPath),
+      ])
+      if (!exists) {
+        const error = `Repository not found: ${repoPath}`
+        this.sendError(error)
+        return { success: false, error }
+      }
+
       // Phase 1: Explore
+      // Adopts the analysis started when the repository was chosen, if any
       this.sendPhaseChange('explore')
-      const explorerResult = await runCodeExplorer(repoPath, {
+      const explorerCallbacks: ExplorerCallbacks = {
         onWorkerStatus: (worker) => this.sendWorkerStatus(worker),
         onLog: (message, icon) => this.log(message, icon),
-      })
+      }
+      let explorerResult: Promise<ExplorerResult>
+      if (prefetched) {
+        prefetched.relay.attach(explorerCallbacks)
+        explorerResult = prefetched.result.then(
+          (analysis) =>
+            analysis ?? runCodeExplorer(repoPath, explorerCallbacks, gitHead, abortController)
+        )
+      } else {
+        explorerResult = runCodeExplorer(repoPath, explorerCallbacks, gitHead, abortController)
+      }
 
       // Phase 2: Engineer
-      this.sendPhaseChange('engineer')
+      // Started alongside the explorer so the engineer's SDK process boots
+      // while the repository is still being analyzed.
       const engineerSession = await runVibeEngineer(
-        explorerResult,
+        repoPath,
+        explorerResult.then((analysis) => {
+          // A stopped explore still resolves with its fallback summary
+          if (!abortController.signal.aborted) {
+            this.sendPhaseChange('engineer')
+          }
+          return analysis
+        }),
         featureRequest,
         {
           onMessage: (msg) => this.sendMessage(msg),
+          onMessageDelta: (delta) => this.sendMessageDelta(delta),
           onLog: (message, icon) => this.log(message, icon),
         },
-        () => this.waitForUserInput()
+        () => this.waitForUserInput(),
+        abortController
       )
 
+      if (abortController.signal.aborted) {
+        return { success: false, error: 'Pipeline stopped' }
+      }
+
       // Phase 3: Crystallize
       this.sendPhaseChange('crystallize')
       const specPath = join(repoPath, 'SPEC.md')
@@ -62,9 +193,14 @@ export class AgentController {
         {
           onMessage: (msg) => this.sendMessage(msg),
           onLog: (message, icon) => this.log(message, icon),
-        }
+        },
+        abortController
       )
 
+      if (abortController.signal.aborted) {
+        return { success: false, error: 'Pipeline stopped' }
+      }
+
       // Complete
       this.sendPhaseChange('complete')
       this.sendPipelineComplete(crystallizerResult.specPath)
@@ -79,6 +215,10 @@ export class AgentController {
       return { success: false, error: errorMessage }
     } finally {
       this.isRunning = false
+      if (this.abortController === abortController) {
+        this.abortController = null
+      }
+      this.flushLogs()
     }
   }
 
@@ -86,26 +226,20 @@ export class AgentController {
    * Handle user message from renderer
    */
   handleUserMessage(message: string): void {
-    // Add to conversation history
-    this.conversationHistory.push({
-      id: uuidv4(),
-      role: 'user',
-      content: message,
-      timestamp: Date.now(),
-    })
-
     // Send to UI
-    this.mainWindow.webContents.send(IPC_CHANNELS.AGENT_MESSAGE, {
+    this.sendMessage({
       id: uuidv4(),
       role: 'user',
       content: message,
       timestamp: Date.now(),
     })
 
-    // Resolve the pending input promise
+    // Resolve the pending input promise, or keep the message for the next one
     if (this.userInputResolve) {
       this.userInputResolve(message)
       this.userInputResolve = null
+    } else {
+      this.queuedInputs.push(message)
     }
   }
 
@@ -114,16 +248,39 @@ export class AgentController {
    */
   stopPipeline(): void {
     this.isRunning = false
+    this.abortController?.abort()
+    this.abortController = null
+    this.prefetched?.abortController.abort()
+    this.prefetched = null
+    this.queuedInputs = []
     if (this.userInputResolve) {
       this.userInputResolve('__CANCELLED__')
       this.userInputResolve = null
     }
   }
 
+  /**
+   * Abort everything still running when the window closes or the app quits,
+   * so no SDK session keeps spending tokens in the background
+   */
+  dispose(): void {
+    this.stopPipeline()
+    if (this.logFlushTimer) {
+      clearTimeout(this.logFlushTimer)
+      this.logFlushTimer = null
+    }
+    this.pendingLogs = []
+  }
+
   /**
    * Wait for user input (used by VibeEngineer)
    */
   private waitForUserInput(): Promise<string> {
+    const queued = this.queuedInputs.shift()
+    if (queued !== undefined) {
+      return Promise.resolve(queued)
+    }
+
     return new Promise((resolve) => {
       this.userInputResolve = resolve
     })
@@ -133,40 +290,55 @@ export class AgentController {
    * Send a message to the renderer
    */
   private sendMessage(msg: AgentMessage): void {
-    this.conversationHistory.push(msg)
-    this.mainWindow.webContents.send(IPC_CHANNELS.AGENT_MESSAGE, msg)
+    this.send(IPC_CHANNELS.AGENT_MESSAGE, msg)
+  }
+
+  /**
+   * Stream a partial agent message to the renderer
+   */
+  private sendMessageDelta(delta: AgentMessageDelta): void {
+    this.send(IPC_CHANNELS.AGENT_MESSAGE_DELTA, delta)
   }
 
   /**
    * Send phase change to renderer
    */
   private sendPhaseChange(phase: Phase): void {
-    this.mainWindow.webContents.send(IPC_CHANNELS.PHASE_CHANGE, phase)
+    this.send(IPC_CHANNELS.PHASE_CHANGE, phase)
   }
 
   /**
    * Send worker status to renderer
    */
   private sendWorkerStatus(worker: WorkerInfo): void {
-    this.mainWindow.webContents.send(IPC_CHANNELS.WORKER_STATUS, worker)
+    this.send(IPC_CHANNELS.WORKER_STATUS, worker)
   }
 
   /**
    * Send error to renderer
    */
   private sendError(error: string): void {
-    this.mainWindow.webContents.send(IPC_CHANNELS.AGENT_ERROR, error)
+    this.send(IPC_CHANNELS.AGENT_ERROR, error)
   }
 
   /**
    * Send pipeline complete to renderer
    */
   private sendPipelineComplete(specPath: string): void {
-    this.mainWindow.webContents.send(IPC_CHANNELS.PIPELINE_COMPLETE, specPath)
+    this.send(IPC_CHANNELS.PIPELINE_COMPLETE, specPath)
+  }
+
+  /**
+   * Send to the renderer, unless its window has already been closed
+   */
+  private send(channel: string, ...args: unknown[]): void {
+    if (!this.webContents.isDestroyed()) {
+      this.webContents.send(channel, ...args)
+    }
   }
 
   /**
-   * Log activity and send to renderer
+   * Log activity; entries reach the renderer in batches
    */
   private log(message: string, icon: string): void {
     console.log(`${icon} ${message}`)
@@ -176,6 +348,24 @@ export class AgentController {
       icon,
       timestamp: Date.now(),
     }
-    this.mainWindow.webContents.send(IPC_CHANNELS.AGENT_LOG, logEntry)
+    this.pendingLogs.push(logEntry)
+    if (!this.logFlushTimer) {
+      this.logFlushTimer = setTimeout(() => this.flushLogs(), LOG_FLUSH_MS)
+    }
+  }
+
+  /**
+   * Send all pending log entries to the renderer in one message
+   */
+  private flushLogs(): void {
+    if (this.logFlushTimer) {
+      clearTimeout(this.logFlushTimer)
+      this.logFlushTimer = null
+    }
+    if (this.pendingLogs.length === 0) return
+
+    const batch = this.pendingLogs
+    this.pendingLogs = []
+    this.send(IPC_CHANNELS.AGENT_LOG, batch)
   }
 }
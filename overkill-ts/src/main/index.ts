@@ -1,8 +1,10 @@
 import { app, BrowserWindow, shell } from 'electron'
 import { join } from 'path'
 import { setupIpcHandlers } from './ipc-handlers'
+import type { AgentController } from './agent-controller'
 
 let mainWindow: BrowserWindow | null = null
+let agentController: AgentController | null = null
 
 const isDev = process.env.NODE_ENV === 'development' || !app.isPackaged
 
@@ -43,7 +45,14 @@ function createWindow(): void {
   }
 
   // Setup IPC handlers
-  setupIpcHandlers(mainWindow)
+  const controller = setupIpcHandlers(mainWindow)
+  agentController = controller
+
+  // Closing the window (which does not quit on macOS) stops running agents
+  mainWindow.on('closed', () => {
+    controller.dispose()
+    mainWindow = null
+  })
 }
 
 app.whenReady().then(() => {
@@ -56,6 +65,10 @@ app.whenReady().then(() => {
   })
 })
 
+app.on('before-quit', () => {
+  agentController?.dispose()
+})
+
 app.on('window-all-closed', () => {
   if (process.platform !== 'darwin') {
     app.quit()
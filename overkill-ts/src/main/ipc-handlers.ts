@@ -10,7 +10,7 @@ import { AgentController } from './agent-controller'
 
 let agentController: AgentController | null = null
 
-export function setupIpcHandlers(window: BrowserWindow): void {
+export function setupIpcHandlers(window: BrowserWindow): AgentController {
   // Create the agent controller
   agentController = new AgentController(window)
 
@@ -25,6 +25,13 @@ export function setupIpcHandlers(window: BrowserWindow): void {
     }
   )
 
+  // Start analyzing a repository before the pipeline is started
+  ipcMain.handle(IPC_CHANNELS.AGENT_PREFETCH, async (_event, repoPath: string): Promise<void> => {
+    if (agentController) {
+      agentController.prefetchAnalysis(repoPath)
+    }
+  })
+
   // Send user message to the agent
   ipcMain.handle(IPC_CHANNELS.AGENT_SEND_MESSAGE, async (_event, message: string): Promise<void> => {
     if (agentController) {
@@ -49,4 +56,6 @@ export function setupIpcHandlers(window: BrowserWindow): void {
 
     return result.canceled ? null : result.filePaths[0] ?? null
   })
+
+  return agentController
 }
@@ -1,6 +1,6 @@
 import { contextBridge, ipcRenderer } from 'electron'
 import { IPC_CHANNELS } from '../shared/ipc-channels'
-import type { AgentMessage, WorkerInfo, Phase, PipelineResult, LogEntry } from '../shared/types'
+import type { AgentMessage, AgentMessageDelta, WorkerInfo, Phase, PipelineResult, LogEntry } from '../shared/types'
 
 // Type-safe API exposed to renderer
 const electronAPI = {
@@ -8,6 +8,9 @@ const electronAPI = {
   startPipeline: (repoPath: string, featureRequest: string): Promise<PipelineResult> =>
     ipcRenderer.invoke(IPC_CHANNELS.AGENT_START, repoPath, featureRequest),
 
+  prefetchAnalysis: (repoPath: string): Promise<void> =>
+    ipcRenderer.invoke(IPC_CHANNELS.AGENT_PREFETCH, repoPath),
+
   sendMessage: (message: string): Promise<void> =>
     ipcRenderer.invoke(IPC_CHANNELS.AGENT_SEND_MESSAGE, message),
 
@@ -24,6 +27,12 @@ const electronAPI = {
     return () => ipcRenderer.removeListener(IPC_CHANNELS.AGENT_MESSAGE, handler)
   },
 
+  onAgentMessageDelta: (callback: (delta: AgentMessageDelta) => void): (() => void) => {
+    const handler = (_event: Electron.IpcRendererEvent, delta: AgentMessageDelta) => callback(delta)
+    ipcRenderer.on(IPC_CHANNELS.AGENT_MESSAGE_DELTA, handler)
+    return () => ipcRenderer.removeListener(IPC_CHANNELS.AGENT_MESSAGE_DELTA, handler)
+  },
+
   onWorkerStatus: (callback: (worker: WorkerInfo) => void): (() => void) => {
     const handler = (_event: Electron.IpcRendererEvent, worker: WorkerInfo) => callback(worker)
     ipcRenderer.on(IPC_CHANNELS.WORKER_STATUS, handler)
@@ -36,8 +45,8 @@ const electronAPI = {
     return () => ipcRenderer.removeListener(IPC_CHANNELS.PHASE_CHANGE, handler)
   },
 
-  onLog: (callback: (log: LogEntry) => void): (() => void) => {
-    const handler = (_event: Electron.IpcRendererEvent, log: LogEntry) => callback(log)
+  onLog: (callback: (logs: LogEntry[]) => void): (() => void) => {
+    const handler = (_event: Electron.IpcRendererEvent, logs: LogEntry[]) => callback(logs)
     ipcRenderer.on(IPC_CHANNELS.AGENT_LOG, handler)
     return () => ipcRenderer.removeListener(IPC_CHANNELS.AGENT_LOG, handler)
   },
@@ -4,6 +4,20 @@ import ChatInterface from './components/ChatInterface'
 import WorkerSidebar from './components/WorkerSidebar'
 import InputBox from './components/InputBox'
 
+// Streamed deltas are merged for this long before a single re-render
+const STREAM_FLUSH_MS = 25
+
+// Older activity entries are dropped past this many
+const MAX_LOG_ENTRIES = 2000
+
+const phaseLabels: Record<Phase, string> = {
+  idle: 'Ready',
+  explore: '🔍 Exploring',
+  engineer: '🤖 Engineering',
+  crystallize: '📝 Crystallizing',
+  complete: '✅ Complete',
+}
+
 const App: React.FC = () => {
   const [phase, setPhase] = useState<Phase>('idle')
   const [messages, setMessages] = useState<AgentMessage[]>([])
@@ -17,8 +31,46 @@ const App: React.FC = () => {
 
   // Setup IPC listeners
   useEffect(() => {
+    // Delta text waiting for the next flush, by message id
+    const pendingDeltas = new Map<string, string>()
+    let flushTimer: ReturnType<typeof setTimeout> | null = null
+
+    const flushDeltas = () => {
+      flushTimer = null
+      const batch = new Map(pendingDeltas)
+      pendingDeltas.clear()
+
+      setMessages((prev) => {
+        const next = prev.map((m) => {
+          const delta = batch.get(m.id)
+          if (delta === undefined) return m
+          batch.delete(m.id)
+          return { ...m, content: m.content + delta, streaming: true }
+        })
+        for (const [id, delta] of batch) {
+          next.push({ id, role: 'agent', content: delta, timestamp: Date.now(), streaming: true })
+        }
+        return next
+      })
+    }
+
     const unsubMessage = window.electronAPI.onAgentMessage((msg) => {
-      setMessages((prev) => [...prev, msg])
+      // The final message supersedes any deltas not yet flushed
+      pendingDeltas.delete(msg.id)
+
+      // A streamed message is finalized under the same id
+      setMessages((prev) =>
+        prev.some((m) => m.id === msg.id)
+          ? prev.map((m) => (m.id === msg.id ? msg : m))
+          : [...prev, msg]
+      )
+    })
+
+    const unsubMessageDelta = window.electronAPI.onAgentMessageDelta(({ id, delta }) => {
+      pendingDeltas.set(id, (pendingDeltas.get(id) ?? '') + delta)
+      if (!flushTimer) {
+        flushTimer = setTimeout(flushDeltas, STREAM_FLUSH_MS)
+      }
     })
 
     const unsubWorker = window.electronAPI.onWorkerStatus((worker) => {
@@ -29,8 +81,8 @@ const App: React.FC = () => {
       setPhase(newPhase)
     })
 
-    const unsubLog = window.electronAPI.onLog((log) => {
-      setLogs((prev) => [...prev, log])
+    const unsubLog = window.electronAPI.onLog((batch) => {
+      setLogs((prev) => [...prev, ...batch].slice(-MAX_LOG_ENTRIES))
     })
 
     const unsubError = window.electronAPI.onError((err) => {
@@ -44,7 +96,9 @@ const App: React.FC = () => {
     })
 
     return () => {
+      if (flushTimer) clearTimeout(flushTimer)
       unsubMessage()
+      unsubMessageDelta()
       unsubWorker()
       unsubPhase()
       unsubLog()
@@ -57,6 +111,8 @@ const App: React.FC = () => {
     const path = await window.electronAPI.pickDirectory()
     if (path) {
       setRepoPath(path)
+      // Analysis starts now and is picked up when the pipeline starts
+      window.electronAPI.prefetchAnalysis(path)
     }
   }
 
@@ -82,14 +138,6 @@ const App: React.FC = () => {
     setIsRunning(false)
   }
 
-  const phaseLabels: Record<Phase, string> = {
-    idle: 'Ready',
-    explore: '🔍 Exploring',
-    engineer: '🤖 Engineering',
-    crystallize: '📝 Crystallizing',
-    complete: '✅ Complete',
-  }
-
   return (
     <div style={styles.container}>
       {/* Header */}
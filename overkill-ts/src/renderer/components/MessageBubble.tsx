@@ -1,56 +1,53 @@
 import React from 'react'
 import ReactMarkdown from 'react-markdown'
+import type { Components } from 'react-markdown'
 import type { AgentMessage } from '../../shared/types'
 
 interface MessageBubbleProps {
   message: AgentMessage
 }
 
-const MessageBubble: React.FC<MessageBubbleProps> = ({ message }) => {
-  const isAgent = message.role === 'agent'
+// Built once and shared by every bubble
+const timeFormat = new Intl.DateTimeFormat([], {
+  hour: '2-digit',
+  minute: '2-digit',
+})
+
+const formatTime = (timestamp: number): string => timeFormat.format(timestamp)
+
+const markdownComponents: Components = {
+  p: ({ children }) => <p style={styles.paragraph}>{children}</p>,
+  strong: ({ children }) => <strong style={styles.strong}>{children}</strong>,
+  code: ({ children, className }) => {
+    const isInline = !className
+    return isInline ? (
+      <code style={styles.inlineCode}>{children}</code>
+    ) : (
+      <code style={styles.blockCode}>{children}</code>
+    )
+  },
+  pre: ({ children }) => <pre style={styles.pre}>{children}</pre>,
+  ul: ({ children }) => <ul style={styles.list}>{children}</ul>,
+  ol: ({ children }) => <ol style={styles.list}>{children}</ol>,
+  li: ({ children }) => <li style={styles.listItem}>{children}</li>,
+}
 
-  const formatTime = (timestamp: number): string => {
-    return new Date(timestamp).toLocaleTimeString([], {
-      hour: '2-digit',
-      minute: '2-digit',
-    })
-  }
+const MessageBubble: React.FC<MessageBubbleProps> = ({ message }) => {
+  const roleStyle = roleStyles[message.role]
 
   return (
-    <div
-      style={{
-        ...styles.container,
-        alignSelf: isAgent ? 'flex-start' : 'flex-end',
-      }}
-    >
-      <div
-        style={{
-          ...styles.bubble,
-          background: isAgent ? '#1a1a1a' : '#4f46e5',
-          borderColor: isAgent ? '#2a2a2a' : '#4338ca',
-        }}
-      >
+    <div style={roleStyle.container}>
+      <div style={roleStyle.bubble}>
         <div style={styles.content}>
-          <ReactMarkdown
-            components={{
-              p: ({ children }) => <p style={styles.paragraph}>{children}</p>,
-              strong: ({ children }) => <strong style={styles.strong}>{children}</strong>,
-              code: ({ children, className }) => {
-                const isInline = !className
-                return isInline ? (
-                  <code style={styles.inlineCode}>{children}</code>
-                ) : (
-                  <code style={styles.blockCode}>{children}</code>
-                )
-              },
-              pre: ({ children }) => <pre style={styles.pre}>{children}</pre>,
-              ul: ({ children }) => <ul style={styles.list}>{children}</ul>,
-              ol: ({ children }) => <ol style={styles.list}>{children}</ol>,
-              li: ({ children }) => <li style={styles.listItem}>{children}</li>,
-            }}
-          >
-            {message.content}
-          </ReactMarkdown>
+          {message.streaming ? (
+            // Plain text while tokens arrive; markdown is parsed once the
+            // final message replaces it
+            <div style={styles.streamingText}>{message.content}</div>
+          ) : (
+            <ReactMarkdown components={markdownComponents}>
+              {message.content}
+            </ReactMarkdown>
+          )}
         </div>
       </div>
       <span style={styles.timestamp}>{formatTime(message.timestamp)}</span>
@@ -75,6 +72,10 @@ const styles: Record<string, React.CSSProperties> = {
     lineHeight: 1.6,
     color: '#e5e5e5',
   },
+  streamingText: {
+    whiteSpace: 'pre-wrap',
+    margin: '0 0 12px 0',
+  },
   paragraph: {
     margin: '0 0 12px 0',
   },
@@ -115,4 +116,21 @@ const styles: Record<string, React.CSSProperties> = {
   },
 }
 
-export default MessageBubble
+// Container and bubble styles for each role, merged once
+const roleStyles: Record<
+  AgentMessage['role'],
+  { container: React.CSSProperties; bubble: React.CSSProperties }
+> = {
+  agent: {
+    container: { ...styles.container, alignSelf: 'flex-start' },
+    bubble: { ...styles.bubble, background: '#1a1a1a', borderColor: '#2a2a2a' },
+  },
+  user: {
+    container: { ...styles.container, alignSelf: 'flex-end' },
+    bubble: { ...styles.bubble, background: '#4f46e5', borderColor: '#4338ca' },
+  },
+}
+
+// Unchanged messages keep their object identity across updates, so only
+// the bubble being streamed into re-renders its markdown
+export default React.memo(MessageBubble)
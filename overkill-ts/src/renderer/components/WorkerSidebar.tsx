@@ -7,6 +7,42 @@ interface WorkerSidebarProps {
   logs: LogEntry[]
 }
 
+type StepStatus = 'completed' | 'active' | 'pending'
+
+const workerTypeLabels: Record<WorkerInfo['type'], { icon: string; label: string }> = {
+  'code-explorer': { icon: '🔍', label: 'Code Explorer' },
+  'researcher': { icon: '🌐', label: 'Researcher' },
+  'dependency-checker': { icon: '📦', label: 'Dependencies' },
+  'pattern-matcher': { icon: '🎯', label: 'Patterns' },
+}
+
+const statusIcons: Record<WorkerInfo['status'], string> = {
+  idle: '⏸️',
+  running: '⏳',
+  completed: '✅',
+  error: '❌',
+}
+
+const phaseSteps: { phase: Phase; label: string; icon: string }[] = [
+  { phase: 'explore', label: 'Explore', icon: '🔍' },
+  { phase: 'engineer', label: 'Engineer', icon: '🤖' },
+  { phase: 'crystallize', label: 'Crystallize', icon: '📝' },
+]
+
+const phaseOrder: Phase[] = ['idle', 'explore', 'engineer', 'crystallize', 'complete']
+
+// Status of every step for each pipeline phase, computed once
+const stepStatuses = Object.fromEntries(
+  phaseOrder.map((phase, currentIndex) => [
+    phase,
+    phaseSteps.map((step): StepStatus => {
+      const stepIndex = phaseOrder.indexOf(step.phase)
+      if (phase === 'complete' || stepIndex < currentIndex) return 'completed'
+      return stepIndex === currentIndex ? 'active' : 'pending'
+    }),
+  ])
+) as Record<Phase, StepStatus[]>
+
 const WorkerSidebar: React.FC<WorkerSidebarProps> = ({ workers, phase, logs }) => {
   const logsEndRef = useRef<HTMLDivElement>(null)
 
@@ -15,37 +51,6 @@ const WorkerSidebar: React.FC<WorkerSidebarProps> = ({ workers, phase, logs }) =
     logsEndRef.current?.scrollIntoView({ behavior: 'smooth' })
   }, [logs])
 
-  const workerTypeLabels: Record<WorkerInfo['type'], { icon: string; label: string }> = {
-    'code-explorer': { icon: '🔍', label: 'Code Explorer' },
-    'researcher': { icon: '🌐', label: 'Researcher' },
-    'dependency-checker': { icon: '📦', label: 'Dependencies' },
-    'pattern-matcher': { icon: '🎯', label: 'Patterns' },
-  }
-
-  const statusIcons: Record<WorkerInfo['status'], string> = {
-    idle: '⏸️',
-    running: '⏳',
-    completed: '✅',
-    error: '❌',
-  }
-
-  const phaseSteps: { phase: Phase; label: string; icon: string }[] = [
-    { phase: 'explore', label: 'Explore', icon: '🔍' },
-    { phase: 'engineer', label: 'Engineer', icon: '🤖' },
-    { phase: 'crystallize', label: 'Crystallize', icon: '📝' },
-  ]
-
-  const getPhaseStatus = (stepPhase: Phase): 'completed' | 'active' | 'pending' => {
-    const order = ['idle', 'explore', 'engineer', 'crystallize', 'complete']
-    const currentIndex = order.indexOf(phase)
-    const stepIndex = order.indexOf(stepPhase)
-
-    if (phase === 'complete') return 'completed'
-    if (stepIndex < currentIndex) return 'completed'
-    if (stepIndex === currentIndex) return 'active'
-    return 'pending'
-  }
-
   return (
     <aside style={styles.sidebar}>
       {/* Phase Progress */}
@@ -53,44 +58,14 @@ const WorkerSidebar: React.FC<WorkerSidebarProps> = ({ workers, phase, logs }) =
         <h3 style={styles.sectionTitle}>Progress</h3>
         <div style={styles.phases}>
           {phaseSteps.map((step, index) => {
-            const status = getPhaseStatus(step.phase)
+            const status = stepStatuses[phase][index]
             return (
               <div key={step.phase} style={styles.phaseItem}>
-                <div
-                  style={{
-                    ...styles.phaseIcon,
-                    background:
-                      status === 'completed'
-                        ? '#166534'
-                        : status === 'active'
-                          ? '#4f46e5'
-                          : '#2a2a2a',
-                    borderColor:
-                      status === 'completed'
-                        ? '#22c55e'
-                        : status === 'active'
-                          ? '#6366f1'
-                          : '#333',
-                  }}
-                >
+                <div style={stepStyles[status].icon}>
                   {status === 'completed' ? '✓' : step.icon}
                 </div>
-                <span
-                  style={{
-                    ...styles.phaseLabel,
-                    color: status === 'pending' ? '#555' : '#e5e5e5',
-                  }}
-                >
-                  {step.label}
-                </span>
-                {index < phaseSteps.length - 1 && (
-                  <div
-                    style={{
-                      ...styles.phaseLine,
-                      background: status === 'completed' ? '#22c55e' : '#333',
-                    }}
-                  />
-                )}
+                <span style={stepStyles[status].label}>{step.label}</span>
+                {index < phaseSteps.length - 1 && <div style={stepStyles[status].line} />}
               </div>
             )
           })}
@@ -266,4 +241,26 @@ const styles: Record<string, React.CSSProperties> = {
   },
 }
 
+// Icon, label and connector styles for each step status, merged once
+const stepStyles: Record<
+  StepStatus,
+  { icon: React.CSSProperties; label: React.CSSProperties; line: React.CSSProperties }
+> = {
+  completed: {
+    icon: { ...styles.phaseIcon, background: '#166534', borderColor: '#22c55e' },
+    label: { ...styles.phaseLabel, color: '#e5e5e5' },
+    line: { ...styles.phaseLine, background: '#22c55e' },
+  },
+  active: {
+    icon: { ...styles.phaseIcon, background: '#4f46e5', borderColor: '#6366f1' },
+    label: { ...styles.phaseLabel, color: '#e5e5e5' },
+    line: { ...styles.phaseLine, background: '#333' },
+  },
+  pending: {
+    icon: { ...styles.phaseIcon, background: '#2a2a2a', borderColor: '#333' },
+    label: { ...styles.phaseLabel, color: '#555' },
+    line: { ...styles.phaseLine, background: '#333' },
+  },
+}
+
 export default WorkerSidebar
@@ -7,13 +7,15 @@ declare global {
   interface Window {
     electronAPI: {
       startPipeline: (repoPath: string, featureRequest: string) => Promise<{ success: boolean; specPath?: string; error?: string }>
+      prefetchAnalysis: (repoPath: string) => Promise<void>
       sendMessage: (message: string) => Promise<void>
       stopPipeline: () => Promise<void>
       pickDirectory: () => Promise<string | null>
       onAgentMessage: (callback: (msg: import('../shared/types').AgentMessage) => void) => () => void
+      onAgentMessageDelta: (callback: (delta: import('../shared/types').AgentMessageDelta) => void) => () => void
       onWorkerStatus: (callback: (worker: import('../shared/types').WorkerInfo) => void) => () => void
       onPhaseChange: (callback: (phase: import('../shared/types').Phase) => void) => () => void
-      onLog: (callback: (log: import('../shared/types').LogEntry) => void) => () => void
+      onLog: (callback: (logs: import('../shared/types').LogEntry[]) => void) => () => void
       onError: (callback: (error: string) => void) => () => void
       onPipelineComplete: (callback: (specPath: string) => void) => () => void
     }
@@ -1,12 +1,14 @@
 export const IPC_CHANNELS = {
   // Renderer -> Main (invoke/handle)
   AGENT_START: 'agent:start',
+  AGENT_PREFETCH: 'agent:prefetch',
   AGENT_SEND_MESSAGE: 'agent:sendMessage',
   AGENT_STOP: 'agent:stop',
   FILE_PICKER: 'dialog:openDirectory',
 
   // Main -> Renderer (send/on)
   AGENT_MESSAGE: 'agent:message',
+  AGENT_MESSAGE_DELTA: 'agent:messageDelta',
   AGENT_STATUS: 'agent:status',
   WORKER_STATUS: 'worker:status',
   PHASE_CHANGE: 'phase:change',
@@ -3,6 +3,13 @@ export interface AgentMessage {
   role: 'user' | 'agent'
   content: string
   timestamp: number
+  // Set while deltas are still arriving for this message
+  streaming?: boolean
+}
+
+export interface AgentMessageDelta {
+  id: string
+  delta: string
 }
 
 export type WorkerType = 'code-explorer' | 'researcher' | 'dependency-checker' | 'pattern-matcher'